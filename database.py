@@ -348,6 +348,36 @@ def store_contact(name: str, node_id: str):
     conn.close()
 
 
+def store_contacts(contacts: Dict[str, str]):
+    """
+    Store or update many contact mappings in a single transaction.
+    
+    Args:
+        contacts: Dictionary mapping client names to node IDs
+    """
+    now = datetime.datetime.now().isoformat()
+    rows = []
+    for name, node_id in contacts.items():
+        name = name.strip()
+        node_id = node_id.strip()
+        if name and node_id:
+            rows.append((name, node_id, now, now))
+    
+    if not rows:
+        return
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.executemany("""
+        INSERT OR REPLACE INTO contacts (name, node_id, last_seen, updated_at)
+        VALUES (?, ?, ?, ?)
+    """, rows)
+    
+    conn.commit()
+    conn.close()
+
+
 def get_node_id_by_name(name: str) -> Optional[str]:
     """
     Get node ID for a given client name.
@@ -6,14 +6,14 @@ to prevent network flooding. Designed for Heltec V3 LoRa radio.
 """
 
 import asyncio
+import functools
 import time
 import re
-import unicodedata
+import traceback
 import os
 import glob
-from queue import Queue
-from typing import Optional, Tuple, Dict, List
-from datetime import datetime, timedelta
+from collections import deque
+from typing import Optional, Tuple, Dict, List, Deque
 
 try:
     from meshcore import MeshCore, EventType
@@ -26,6 +26,27 @@ except ImportError:
     )
 
 import config
+import database
+
+# Hex node ID / public key prefix (at least 8 hex digits), used with fullmatch()
+_HEX_NODE_ID_RE = re.compile(r'[a-fA-F0-9]{8,}')
+
+# Device number in a serial port name (ttyUSB10 -> 10)
+_DIGITS_RE = re.compile(r'\d+')
+
+# Characters not allowed in a normalized mesh contact name
+_NAME_DISALLOWED_RE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+# Zero-width characters removed before whitespace normalization
+_ZERO_WIDTH_TRANS = str.maketrans({
+    "\ufeff": None,  # BOM / zero-width no-break space
+    "\u200b": None,  # zero-width space
+    "\u200c": None,  # zero-width non-joiner
+    "\u200d": None,  # zero-width joiner
+})
+
+# Any run of unicode whitespace
+_WHITESPACE_RE = re.compile(r'\s+')
 
 
 def _normalize_text(value: str) -> str:
@@ -36,17 +57,13 @@ def _normalize_text(value: str) -> str:
     """
     if value is None:
         return ""
-    # Normalize a wide set of unicode whitespace / zero-width chars
-    value = str(value)
-    value = value.replace("\ufeff", "")  # BOM / zero-width no-break space
-    value = value.replace("\u200b", "")  # zero-width space
-    value = value.replace("\u200c", "")  # zero-width non-joiner
-    value = value.replace("\u200d", "")  # zero-width joiner
-    # Convert any whitespace to normal spaces so collapse works consistently.
-    value = "".join((" " if ch.isspace() else ch) for ch in value)
-    return re.sub(r"[ ]+", " ", value).strip()
+    # Drop zero-width chars, then collapse any unicode whitespace run
+    # (\s matches exactly the str.isspace() characters) to one space.
+    value = str(value).translate(_ZERO_WIDTH_TRANS)
+    return _WHITESPACE_RE.sub(" ", value).strip()
 
 
+@functools.lru_cache(maxsize=512)
 def _normalize_contact_name(value: str) -> str:
     """
     Normalize a MeshCore contact name into a stable lookup key.
@@ -57,33 +74,40 @@ def _normalize_contact_name(value: str) -> str:
     if not value:
         return ""
     
+    # Quick check: plain ASCII names with only allowed characters (the
+    # common case) are already normalized
+    if value.isascii() and _NAME_DISALLOWED_RE.search(value) is None:
+        return value
+    
     # First normalize whitespace (this handles NBSP and other whitespace issues)
     text = _normalize_text(value)
     if not text:
         return ""
 
-    # Remove all control/format characters (Cc/Cf) defensively - these are invisible
-    # but preserve all visible characters including alphanumeric, underscore, dot, dash
-    cleaned = []
-    for ch in text:
-        cat = unicodedata.category(ch)
-        # Keep printable characters (letters, numbers, punctuation like dash, dot, underscore)
-        if cat[0] in ('L', 'N', 'P', 'S'):  # Letter, Number, Punctuation, Symbol
-            cleaned.append(ch)
-        elif cat in ('Cc', 'Cf'):  # Control and Format characters - skip these
-            continue
-        # For any other category, be conservative and keep it
-        else:
-            cleaned.append(ch)
-    
-    text = "".join(cleaned)
-
     # Keep only characters we expect in mesh names (alnum + _ . -).
-    normalized = re.sub(r"[^A-Za-z0-9_.-]+", "", text)
+    # This also drops every control/format (Cc/Cf) character, none of
+    # which are in the allowed set.
+    normalized = _NAME_DISALLOWED_RE.sub("", text)
     
     return normalized
 
 
+def _is_error_result(result) -> bool:
+    """Check whether a meshcore_py command result is an ERROR event."""
+    return bool(result) and result.type == EventType.ERROR
+
+
+@functools.lru_cache(maxsize=1024)
+def _looks_like_node_id(value: str) -> bool:
+    """Check whether a string is a hex node ID (memoized, IDs repeat a lot)."""
+    return _HEX_NODE_ID_RE.fullmatch(value) is not None
+
+
+def _version_from_info(info: Dict) -> Optional[str]:
+    """Extract the firmware version from a DEVICE_INFO payload."""
+    return info.get("version") or info.get("ver") or info.get("firmware_version")
+
+
 def _is_running_as_root() -> bool:
     """Check if the current process is running as root."""
     try:
@@ -103,19 +127,16 @@ def _discover_serial_ports() -> List[str]:
     ports = []
     
     # Common serial port patterns
-    patterns = [
+    patterns = (
         '/dev/ttyUSB*',  # USB serial adapters
         '/dev/ttyACM*',  # USB CDC devices
         '/dev/ttyS*',    # Serial ports
-    ]
+    )
     
     for pattern in patterns:
         try:
-            found_ports = glob.glob(pattern)
-            for port in found_ports:
-                # Check if port is accessible
-                if os.path.exists(port):
-                    ports.append(port)
+            # glob only returns entries it found in /dev, no extra stat needed
+            ports.extend(glob.glob(pattern))
         except Exception:
             pass
     
@@ -123,7 +144,8 @@ def _discover_serial_ports() -> List[str]:
     def sort_key(port):
         parts = port.split('/')[-1]
         prefix = ''.join(c for c in parts if not c.isdigit())
-        number = int(re.search(r'\d+', parts).group()) if re.search(r'\d+', parts) else 0
+        match = _DIGITS_RE.search(parts)
+        number = int(match.group()) if match else 0
         return (prefix, number)
     
     ports.sort(key=sort_key)
@@ -148,8 +170,8 @@ class MeshHandler:
             max_message_length: Maximum message length in bytes (default: 200)
         """
         self.meshcore: Optional[MeshCore] = None
-        self.message_queue = Queue()
-        self.last_send_time = None
+        self.message_queue: Deque[Tuple[str, str]] = deque()
+        self.last_send_time: Optional[float] = None  # time.monotonic() of last send
         self.min_send_interval = min_send_interval
         self.max_message_length = max_message_length
         self.radio_version = None
@@ -162,15 +184,26 @@ class MeshHandler:
         
         # Cache for contacts mapping (adv_name -> public_key)
         self._contacts_cache_ts = 0.0
-        self._contacts_cache_ttl_s = 10.0
+        self._contacts_cache_ttl_s = 60.0  # refreshed early on lookup misses
         self._contacts_cache_name_to_pubkey: Dict[str, str] = {}
-        
-        # Message event handler
-        self._pending_messages: List[Tuple[str, str]] = []
+        self._contacts_cache_lower_to_pubkey: Dict[str, str] = {}
+        
+        # Memo for resolved names (name -> (hex node ID, resolved at))
+        self._name_to_id_cache: Dict[str, Tuple[str, float]] = {}
+        self._name_to_id_cache_ttl_s = 60.0
+        self._name_to_id_cache_max = 256
+        # Names that failed to resolve (name -> failed at)
+        self._name_miss_cache: Dict[str, float] = {}
+        self._name_miss_cache_ttl_s = 10.0
+        
+        # Inbox filled by the message event handler
+        self._pending_messages: Deque[Tuple[str, str]] = deque()
+        self._auto_fetching = False
     
     async def initialize(self):
         """Initialize and connect to serial device (async)."""
         await self._connect_serial()
+        await self._start_message_listener()
     
     async def _connect_serial(self):
         """
@@ -183,9 +216,6 @@ class MeshHandler:
         4. Connect using MeshCore.create_serial()
         5. Store successful connection
         """
-        import database
-        import glob
-        
         # Step 1: Check database for stored serial port
         stored_port = database.get_stored_serial_port()
         
@@ -204,8 +234,9 @@ class MeshHandler:
                     # Test connection by getting device info
                     try:
                         info_result = await self.meshcore.commands.send_device_query()
-                        if info_result and info_result.type == EventType.ERROR:
+                        if _is_error_result(info_result):
                             raise RuntimeError(f"Connection test failed: {info_result.payload}")
+                        self._cache_device_info(info_result)
                     except Exception as e:
                         print(f"Warning: Could not verify connection: {e}")
                     
@@ -270,8 +301,9 @@ class MeshHandler:
             # Test connection by getting device info
             try:
                 info_result = await self.meshcore.commands.send_device_query()
-                if info_result and info_result.type == EventType.ERROR:
+                if _is_error_result(info_result):
                     raise RuntimeError(f"Connection test failed: {info_result.payload}")
+                self._cache_device_info(info_result)
             except Exception as e:
                 print(f"Warning: Could not verify connection: {e}")
             
@@ -299,9 +331,83 @@ class MeshHandler:
             print("  - No other program is using the port")
             raise RuntimeError(f"Failed to connect to serial port {selected_port}")
     
+    async def _start_message_listener(self):
+        """
+        Subscribe to incoming message events (async).
+        
+        meshcore_py fetches messages over the open connection as soon as the
+        radio reports them waiting, so listen() only has to drain the inbox.
+        Falls back to polling get_msg() if auto-fetching is not available.
+        """
+        subscriptions = []
+        try:
+            subscriptions.append(
+                self.meshcore.subscribe(EventType.CONTACT_MSG_RECV, self._on_message_event)
+            )
+            subscriptions.append(
+                self.meshcore.subscribe(EventType.CHANNEL_MSG_RECV, self._on_message_event)
+            )
+            await self.meshcore.start_auto_message_fetching()
+            self._auto_fetching = True
+        except Exception as e:
+            print(f"Warning: Could not start message auto-fetching, polling instead: {e}")
+            self._auto_fetching = False
+            # get_msg() replies are dispatched as events too; drop the handlers
+            # so polled messages don't also pile up in the unused inbox
+            for subscription in subscriptions:
+                try:
+                    self.meshcore.unsubscribe(subscription)
+                except Exception:
+                    pass
+    
+    def _on_message_event(self, event):
+        """Queue an incoming message event for listen()."""
+        try:
+            message = self._message_from_event(event)
+            if message:
+                self._pending_messages.append(message)
+        except Exception as e:
+            print(f"[ERROR] Error handling incoming message: {e}")
+    
+    def _message_from_event(self, result) -> Optional[Tuple[str, str]]:
+        """
+        Extract (sender_node_id, message_text) from a message event.
+        
+        Returns:
+            Tuple of (sender_node_id, message_text) or None if not a valid message
+        """
+        if not result:
+            return None
+        
+        # Contact and channel messages carry the same payload fields
+        if result.type in (EventType.CONTACT_MSG_RECV, EventType.CHANNEL_MSG_RECV):
+            payload = result.payload
+            node_id = payload.get("pubkey_prefix") or payload.get("pubkey")
+            message = payload.get("text")
+            
+            if node_id and message:
+                # Clean node_id (remove ! prefix, ensure lowercase)
+                node_id = node_id.lstrip("!").lower().strip()
+                # Verify it's a valid hex string
+                if _looks_like_node_id(node_id):
+                    # Store node ID in friends
+                    self.friends.add(node_id)
+                    return (node_id, message)
+        
+        return None
+    
+    def _cache_device_info(self, result):
+        """Keep a DEVICE_INFO reply so initialize_radio() need not query again."""
+        if result and result.type == EventType.DEVICE_INFO and isinstance(result.payload, dict):
+            self.radio_info = result.payload
+    
     async def listen(self) -> Optional[Tuple[str, str]]:
         """
-        Poll for new messages using meshcore_py get_msg().
+        Get the next received message, if any.
+        
+        Messages are pushed into an inbox by the meshcore_py event
+        subscription, so this does not block. Without auto-fetching it
+        polls get_msg() instead.
         
         Returns:
             Tuple of (sender_node_id, message_text) or None if no message
@@ -309,42 +415,16 @@ class MeshHandler:
         if not self.meshcore:
             return None
         
+        if self._auto_fetching:
+            try:
+                return self._pending_messages.popleft()
+            except IndexError:
+                return None
+        
         try:
             # Use meshcore_py get_msg with short timeout
             result = await self.meshcore.commands.get_msg(timeout=2.0)
-            
-            if not result:
-                return None
-            
-            if result.type == EventType.CONTACT_MSG_RECV:
-                payload = result.payload
-                node_id = payload.get("pubkey_prefix") or payload.get("pubkey")
-                message = payload.get("text")
-                
-                if node_id and message:
-                    # Clean node_id (remove ! prefix, ensure lowercase)
-                    node_id = node_id.lstrip("!").lower().strip()
-                    # Verify it's a valid hex string
-                    if re.fullmatch(r'^[a-f0-9]{8,}$', node_id):
-                        # Store node ID in friends
-                        if node_id not in self.friends:
-                            self.friends.add(node_id)
-                        return (node_id, message)
-            
-            elif result.type == EventType.CHANNEL_MSG_RECV:
-                # Handle channel messages if needed
-                payload = result.payload
-                node_id = payload.get("pubkey_prefix") or payload.get("pubkey")
-                message = payload.get("text")
-                
-                if node_id and message:
-                    node_id = node_id.lstrip("!").lower().strip()
-                    if re.fullmatch(r'^[a-f0-9]{8,}$', node_id):
-                        if node_id not in self.friends:
-                            self.friends.add(node_id)
-                        return (node_id, message)
-            
-            return None
+            return self._message_from_event(result)
             
         except Exception as e:
             # Log error but don't crash
@@ -362,65 +442,42 @@ class MeshHandler:
             node_id: Target Node ID (hex string, e.g., "a1b2c3d4e5f6")
             text: Message text to send
         """
-        # Strip whitespace from node_id
+        # Strip whitespace from node_id; names are resolved later by _process_queue()
         node_id = node_id.strip().lstrip("!")
         
-        # Verify node_id is a valid hex string
-        if not re.fullmatch(r'^[a-fA-F0-9]{8,}$', node_id):
-            # For name lookup, we'll need to do it async later
-            # For now, just queue it and let async processing handle the lookup
-            pass
-        
         # Sanitize message
         sanitized = self._sanitize_message(text)
         
         # Add to queue (with original node_id - async processing will validate/lookup)
-        self.message_queue.put((node_id, sanitized))
+        self.message_queue.append((node_id, sanitized))
     
     async def _process_queue(self):
         """Internal method to send queued messages respecting rate limits."""
-        if self.message_queue.empty() or not self.meshcore:
+        if not self.message_queue or not self.meshcore:
             return
         
         # Check if enough time has passed
-        now = datetime.now()
+        now = time.monotonic()
         if self.last_send_time is not None:
-            time_since_last = (now - self.last_send_time).total_seconds()
+            time_since_last = now - self.last_send_time
             if time_since_last < self.min_send_interval:
                 return
         
         # Send next message from queue
         try:
-            node_id, message = self.message_queue.get_nowait()
-            node_id = node_id.strip().lstrip("!")
+            # send() already stripped whitespace and the "!" prefix
+            node_id, message = self.message_queue.popleft()
             
             # If node_id is not a hex string, try to look it up
-            if not re.fullmatch(r'^[a-fA-F0-9]{8,}$', node_id):
-                # Get contacts mapping
-                name_to_pub = await self._get_contacts_name_to_pubkey_map()
-                # Try exact match
-                node_id_actual = name_to_pub.get(node_id)
-                if not node_id_actual:
-                    # Try normalized name
-                    normalized_name = _normalize_contact_name(node_id)
-                    node_id_actual = name_to_pub.get(normalized_name)
-                    if not node_id_actual:
-                        # Try case-insensitive match
-                        for name, pub in name_to_pub.items():
-                            if name.lower() == node_id.lower():
-                                node_id_actual = pub
-                                break
-                
-                if node_id_actual and re.fullmatch(r'^[a-fA-F0-9]{8,}$', node_id_actual):
+            # (_get_node_id_from_name() only returns validated hex IDs)
+            if not _looks_like_node_id(node_id):
+                node_id_actual = await self._get_node_id_from_name(node_id)
+                if node_id_actual:
                     node_id = node_id_actual
                 else:
                     # Can't resolve node_id, skip this message
                     return
             
-            # Final verification
-            if not re.fullmatch(r'^[a-fA-F0-9]{8,}$', node_id):
-                return
-            
             # Ensure contact is added (meshcore handles this automatically, but we can try)
             await self._ensure_contact(node_id)
             
@@ -430,20 +487,92 @@ class MeshHandler:
             if result:
                 if result.type == EventType.MSG_SENT:
                     self.last_send_time = now
-                elif result.type == EventType.ERROR:
+                elif _is_error_result(result):
                     print(f"Failed to send message: {result.payload}")
             
         except Exception as e:
             print(f"Error processing message queue: {e}")
     
-    async def process_pending_messages(self):
-        """Process any pending messages in the queue."""
-        await self._process_queue()
+    async def process_pending_messages(self, max_messages: int = 10):
+        """
+        Process pending messages in the queue.
+        
+        Sends up to max_messages, sleeping only for whatever is left of the
+        rate-limit interval before each send.
+        """
+        processed = 0
+        while self.message_queue and self.meshcore and processed < max_messages:
+            if self.last_send_time is not None:
+                wait = self.min_send_interval - (time.monotonic() - self.last_send_time)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            await self._process_queue()
+            processed += 1
+    
+    async def _get_node_id_from_name(self, name: str) -> Optional[str]:
+        """
+        Resolve a contact name to a hex node ID.
+        
+        Successful lookups are memoized for a while so repeated traffic to
+        the same peer skips the contacts fetch and the name matching;
+        failed lookups are remembered briefly so an unknown name does not
+        redo the whole ladder for every queued message.
+        
+        Returns:
+            Hex node ID, or None if the name could not be resolved
+        """
+        now = time.time()
+        cached = self._name_to_id_cache.get(name)
+        if cached and (now - cached[1]) < self._name_to_id_cache_ttl_s:
+            return cached[0]
+        
+        # Recently unresolvable names are not looked up again right away
+        missed_at = self._name_miss_cache.get(name)
+        if missed_at is not None and (now - missed_at) < self._name_miss_cache_ttl_s:
+            return None
+        
+        # Get contacts mapping; only refetch on a miss against a cached copy
+        cache_ts = self._contacts_cache_ts
+        name_to_pub = await self._get_contacts_name_to_pubkey_map()
+        node_id = self._match_contact_name(name, name_to_pub)
+        if not node_id and name_to_pub and self._contacts_cache_ts == cache_ts:
+            node_id = self._match_contact_name(
+                name, await self._get_contacts_name_to_pubkey_map(force_refresh=True)
+            )
+        
+        if not node_id or not _looks_like_node_id(node_id):
+            if name not in self._name_miss_cache and len(self._name_miss_cache) >= self._name_to_id_cache_max:
+                del self._name_miss_cache[next(iter(self._name_miss_cache))]
+            self._name_miss_cache[name] = now
+            return None
+        
+        self._name_miss_cache.pop(name, None)
+        # Bounded memo: evict the oldest entry once full
+        if name not in self._name_to_id_cache and len(self._name_to_id_cache) >= self._name_to_id_cache_max:
+            del self._name_to_id_cache[next(iter(self._name_to_id_cache))]
+        self._name_to_id_cache[name] = (node_id, now)
+        return node_id
+    
+    def _match_contact_name(self, name: str, name_to_pub: Dict[str, str]) -> Optional[str]:
+        """Look a name up in the contacts mapping (exact, normalized, then case-insensitive)."""
+        # Try exact match
+        node_id = name_to_pub.get(name)
+        if not node_id:
+            # Try normalized name
+            normalized_name = _normalize_contact_name(name)
+            node_id = name_to_pub.get(normalized_name)
+            if not node_id and name_to_pub:
+                # Try case-insensitive match (index built with the contacts cache)
+                node_id = self._contacts_cache_lower_to_pubkey.get(name.lower())
+        return node_id
     
     async def _get_contacts_name_to_pubkey_map(self, force_refresh: bool = False) -> Dict[str, str]:
         """
         Get contacts mapping (name -> hex node ID) using meshcore_py.
         
+        The cached mapping is reused until it expires or is empty; callers
+        that miss a name force a refresh themselves.
+        
         Returns:
             Dictionary mapping contact names to hex node IDs
         """
@@ -451,7 +580,8 @@ class MeshHandler:
             return {}
         
         now = time.time()
-        if not force_refresh and (now - self._contacts_cache_ts) < self._contacts_cache_ttl_s:
+        if (not force_refresh and self._contacts_cache_name_to_pubkey
+                and (now - self._contacts_cache_ts) < self._contacts_cache_ttl_s):
             return self._contacts_cache_name_to_pubkey
         
         try:
@@ -460,49 +590,69 @@ class MeshHandler:
             if not result:
                 return {}
             
-            if result.type == EventType.ERROR:
+            if _is_error_result(result):
                 return {}
             
             contacts = result.payload
             if not isinstance(contacts, dict):
                 return {}
             
-            mapping: Dict[str, str] = {}
-            for public_key, info in contacts.items():
-                if not isinstance(public_key, str) or not isinstance(info, dict):
-                    continue
-                
-                adv_name = info.get("adv_name") or info.get("name")
-                if not isinstance(adv_name, str) or not adv_name.strip():
-                    continue
-                
-                name_clean = adv_name.strip()
-                pub_norm = public_key.lstrip("!").lower().strip()
-                if not re.fullmatch(r"[a-f0-9]{8,}", pub_norm):
-                    continue
-                
-                # Use short hex ID
-                dest = pub_norm[:12] if len(pub_norm) >= 12 else pub_norm
-                mapping[name_clean] = dest
-            
-            # Cache
-            self._contacts_cache_ts = now
-            self._contacts_cache_name_to_pubkey = mapping
-            
-            # Store in DB for persistence
-            if mapping:
-                try:
-                    import database
-                    for n, k in mapping.items():
-                        database.store_contact(n, k)
-                except Exception:
-                    pass
-            
-            return mapping
+            return self._update_contacts_cache(contacts)
             
         except Exception as e:
             return {}
     
+    def _update_contacts_cache(self, contacts: Dict) -> Dict[str, str]:
+        """
+        Rebuild the contacts name cache from a get_contacts() payload.
+        
+        Returns:
+            Dictionary mapping contact names to hex node IDs
+        """
+        mapping: Dict[str, str] = {}
+        for public_key, info in contacts.items():
+            # Well-formed entries are str -> dict with a str name; anything
+            # else fails one of these calls and is skipped
+            try:
+                adv_name = info.get("adv_name") or info.get("name")
+                name_clean = adv_name.strip()
+                pub_norm = public_key.lstrip("!").lower().strip()
+            except (AttributeError, TypeError):
+                continue
+            
+            if not name_clean or not _looks_like_node_id(pub_norm):
+                continue
+            
+            # Use short hex ID
+            dest = pub_norm[:12] if len(pub_norm) >= 12 else pub_norm
+            mapping[name_clean] = dest
+        
+        # Lowercased index for case-insensitive lookups (first match wins)
+        lower_mapping: Dict[str, str] = {}
+        for n, k in mapping.items():
+            lower_mapping.setdefault(n.lower(), k)
+        
+        # Discovery refreshes this every pass and the list is usually the
+        # same; only drop memoized lookups and write the DB when it changed
+        changed = mapping != self._contacts_cache_name_to_pubkey
+        
+        self._contacts_cache_ts = time.time()
+        self._contacts_cache_name_to_pubkey = mapping
+        self._contacts_cache_lower_to_pubkey = lower_mapping
+        if changed:
+            # Memoized name resolutions may be stale now
+            self._name_to_id_cache.clear()
+            self._name_miss_cache.clear()
+        
+        # Store in DB for persistence
+        if mapping and changed:
+            try:
+                database.store_contacts(mapping)
+            except Exception:
+                pass
+        
+        return mapping
+    
     async def _ensure_contact(self, node_id: str) -> bool:
         """Ensure a contact is added using meshcore_py."""
         if not self.meshcore:
@@ -523,6 +673,13 @@ class MeshHandler:
         if not text:
             return ""
         
+        # Fast path: a short single ASCII line (never ASCII art) only
+        # needs trailing whitespace removed
+        if '\n' not in text:
+            stripped = text.rstrip()
+            if stripped.isascii() and len(stripped) <= self.max_message_length:
+                return stripped
+        
         lines = text.split('\n')
         is_ascii_art = False
         
@@ -544,18 +701,17 @@ class MeshHandler:
             # Only ensure it's under max_message_length
             sanitized = text
         else:
-            # For regular text, clean up whitespace
-            cleaned_lines = [line.rstrip() for line in lines]
-            while cleaned_lines and not cleaned_lines[0].strip():
-                cleaned_lines.pop(0)
-            while cleaned_lines and not cleaned_lines[-1].strip():
-                cleaned_lines.pop()
-            sanitized = '\n'.join(cleaned_lines)
-        
-        # Ensure under max length (safety check)
-        if len(sanitized.encode('utf-8')) > self.max_message_length:
+            # For regular text, strip trailing whitespace from every line,
+            # then drop blank lines at the start and end
+            sanitized = '\n'.join([line.rstrip() for line in lines]).strip('\n')
+        
+        # Ensure under max length (safety check); pure ASCII text is one
+        # byte per character, so it needs no encoding to measure or cut
+        is_ascii = sanitized.isascii()
+        encoded = None if is_ascii else sanitized.encode('utf-8')
+        byte_len = len(sanitized) if is_ascii else len(encoded)
+        if byte_len > self.max_message_length:
             # Truncate carefully to preserve structure
-            byte_len = len(sanitized.encode('utf-8'))
             if is_ascii_art:
                 # For ASCII art, try to preserve complete lines
                 lines = sanitized.split('\n')
@@ -569,13 +725,20 @@ class MeshHandler:
                     else:
                         break
                 sanitized = '\n'.join(result_lines)
-                if len(sanitized.encode('utf-8')) < self.max_message_length - 3:
+                # Joined length is the counted bytes minus the last newline
+                if max(current_bytes - 1, 0) < self.max_message_length - 3:
                     sanitized += "..."
+            elif is_ascii:
+                # For ASCII text, a plain slice is already a byte-exact cut
+                sanitized = sanitized[:self.max_message_length]
             else:
-                # For regular text, truncate character by character
-                while len(sanitized.encode('utf-8')) > self.max_message_length:
-                    sanitized = sanitized[:-1]
-                if len(sanitized.encode('utf-8')) < self.max_message_length - 3:
+                # For regular text, cut at the byte limit, backing up over
+                # UTF-8 continuation bytes (10xxxxxx) to a character boundary
+                cut = self.max_message_length
+                while cut > 0 and (encoded[cut] & 0xC0) == 0x80:
+                    cut -= 1
+                sanitized = encoded[:cut].decode('utf-8')
+                if cut < self.max_message_length - 3:
                     sanitized += "..."
         
         return sanitized
@@ -596,16 +759,15 @@ class MeshHandler:
         try:
             print("Initializing radio configuration...")
             
-            # Get radio version
-            version_info = await self.get_radio_version()
-            if version_info:
-                self.radio_version = version_info
-                print(f"Radio version: {version_info}")
-            
-            # Get radio link information
-            link_info = await self.get_radio_link_info()
+            # Get radio link information (one device query also yields the version);
+            # reuse the reply from the connection test if we already have it
+            link_info = self.radio_info or await self.get_radio_link_info()
             if link_info:
                 self.radio_info = link_info
+                version_info = _version_from_info(link_info)
+                if version_info:
+                    self.radio_version = version_info
+                    print(f"Radio version: {version_info}")
             
             # Step 1: Configure radio from config.ini
             print("\n[1/3] Configuring radio from config.ini...")
@@ -637,7 +799,6 @@ class MeshHandler:
                 
         except Exception as e:
             print(f"Error initializing radio: {e}")
-            import traceback
             traceback.print_exc()
             # Don't block startup on radio init errors
             return True
@@ -649,7 +810,7 @@ class MeshHandler:
         try:
             value = "on" if enabled else "off"
             result = await self.meshcore.commands.set_custom_var("repeat", value)
-            if result and result.type == EventType.ERROR:
+            if _is_error_result(result):
                 print(f"Warning: Could not set message relay: {result.payload}")
                 return False
             return True
@@ -662,15 +823,8 @@ class MeshHandler:
         if not self.meshcore:
             return None
         
-        try:
-            result = await self.meshcore.commands.send_device_query()
-            if result and result.type == EventType.DEVICE_INFO:
-                info = result.payload
-                if isinstance(info, dict):
-                    return info.get("version") or info.get("ver") or info.get("firmware_version")
-            return None
-        except Exception:
-            return None
+        info = await self.get_radio_link_info()
+        return _version_from_info(info) if info else None
     
     async def get_radio_link_info(self) -> Optional[Dict]:
         """Get radio link information using meshcore_py."""
@@ -715,7 +869,7 @@ class MeshHandler:
                 print("Radio preset configured successfully")
                 print("Note: Radio settings will be applied after device reboot")
                 return True
-            elif result and result.type == EventType.ERROR:
+            elif _is_error_result(result):
                 print(f"Warning: Radio configuration returned error: {result.payload}")
                 # Continue anyway - settings might still be applied
                 return True
@@ -746,7 +900,7 @@ class MeshHandler:
             if result and result.type == EventType.OK:
                 print(f"Radio name set to: {name}")
                 return True
-            elif result and result.type == EventType.ERROR:
+            elif _is_error_result(result):
                 print(f"Warning: Failed to set radio name: {result.payload}")
                 return False
             else:
@@ -802,7 +956,7 @@ class MeshHandler:
             return False
         try:
             result = await self.meshcore.commands.send_chan_msg(channel, text)
-            if result and result.type == EventType.ERROR:
+            if _is_error_result(result):
                 print(f"Error sending public message: {result.payload}")
                 return False
             return True
@@ -821,27 +975,30 @@ class MeshHandler:
             if not result:
                 return
             
-            if result.type == EventType.ERROR:
+            if _is_error_result(result):
                 return
             
             contacts = result.payload
             if isinstance(contacts, dict):
-                for public_key, info in contacts.items():
-                    if isinstance(public_key, str) and isinstance(info, dict):
-                        pub_clean = public_key.lstrip("!").lower().strip()
-                        if re.fullmatch(r'[a-f0-9]{8,}', pub_clean):
-                            hex_id = pub_clean[:12] if len(pub_clean) >= 12 else pub_clean
-                            if hex_id not in self.friends:
-                                self.friends.add(hex_id)
+                pub_keys = (
+                    public_key.lstrip("!").lower().strip()
+                    for public_key, info in contacts.items()
+                    if isinstance(public_key, str) and isinstance(info, dict)
+                )
+                # set.update() already skips known nodes, no per-node membership check needed
+                self.friends.update(
+                    pub_clean[:12]
+                    for pub_clean in pub_keys
+                    if _looks_like_node_id(pub_clean)
+                )
+                # Refresh name lookups from the same fetch instead of a second one
+                self._update_contacts_cache(contacts)
         except Exception as e:
             print(f"Error discovering nodes: {e}")
     
     def add_friend(self, node_id: str) -> bool:
         """Track a node locally."""
-        node_id = node_id.strip()
-        if node_id in self.friends:
-            return True
-        self.friends.add(node_id)
+        self.friends.add(node_id.strip())
         return True
     
     def get_friends_list(self) -> list:
@@ -851,6 +1008,12 @@ class MeshHandler:
     async def disconnect(self):
         """Disconnect from MeshCore device."""
         if self.meshcore:
+            if self._auto_fetching:
+                try:
+                    await self.meshcore.stop_auto_message_fetching()
+                except Exception:
+                    pass
+                self._auto_fetching = False
             try:
                 await self.meshcore.disconnect()
             except Exception: